@@ -1,5 +1,9 @@
 from __future__ import annotations
-from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+from array import array
+from bisect import bisect_right
+from itertools import repeat
+from operator import itemgetter, sub
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 T = TypeVar("T")
 
@@ -34,6 +38,279 @@ def _default_aux(x: Any) -> Any:
     return None
 
 
+def _components(
+    items: Sequence[T],
+    value_fn: Callable[[T], Any],
+    aux_fn: Optional[Callable[[T], Any]] = None,
+) -> Tuple[List[Any], Optional[List[Any]]]:
+    """Extract the primary (and optionally auxiliary) values of all items.
+
+    Returns a pair `(values, auxes)` of lists parallel to `items`; `auxes`
+    is None when no `aux_fn` is given. Detectors call this once per input
+    so that windows can be compared as whole list slices.
+    """
+    plain = pairs = False
+    if value_fn is _default_primary or aux_fn is _default_aux:
+        # Specialise the default extractors when all items share one shape;
+        # mixed inputs keep the per-item isinstance checks.
+        plain = not any(map(isinstance, items, repeat(tuple)))
+        pairs = (
+            not plain
+            and all(map(isinstance, items, repeat(tuple)))
+            and min(map(len, items)) >= 2
+        )
+    if pairs:
+        if value_fn is _default_primary:
+            value_fn = itemgetter(0)
+        if aux_fn is _default_aux:
+            aux_fn = itemgetter(1)
+
+    if plain and value_fn is _default_primary:
+        values = list(items)
+    else:
+        values = list(map(value_fn, items))
+
+    if aux_fn is None:
+        auxes = None
+    elif plain and aux_fn is _default_aux:
+        auxes = [None] * len(items)
+    else:
+        auxes = list(map(aux_fn, items))
+
+    return values, auxes
+
+
+def _all_aux_none(pat_aux: List[Any], seq_aux: List[Any]) -> bool:
+    """Return True if every auxiliary value on both sides equals None.
+
+    Window aux comparisons then always succeed and can be skipped, which is
+    the common case for plain (non-tuple) items.
+    """
+    return (
+        pat_aux.count(None) == len(pat_aux)
+        and seq_aux.count(None) == len(seq_aux)
+    )
+
+
+def _no_identity_match(values: List[Any]) -> List[Any]:
+    """Prepare pattern values for list-slice comparison with plain `==`.
+
+    List equality treats the same object as equal before calling `__eq__`,
+    so a NaN shared by pattern and sequence would match in a slice
+    comparison although `==` says otherwise. Values that are not equal to
+    themselves are replaced by fresh objects that only equal themselves.
+    """
+    if all(v == v for v in values):
+        return values
+    return [v if v == v else object() for v in values]
+
+
+def _horspool_table(pattern: Sequence[T]) -> Dict[Any, int]:
+    """Build the Boyer–Moore–Horspool bad-character shift table.
+
+    Maps each item of `pattern` (except the last) to the distance from its
+    last occurrence to the end of the pattern. Items absent from the table
+    shift by the full pattern length. Raises TypeError if an item is not
+    hashable.
+    """
+    L = len(pattern)
+    table: Dict[Any, int] = {}
+    for k in range(L - 1):
+        table[pattern[k]] = L - 1 - k
+    return table
+
+
+def _rabin_karp(
+    pattern: Sequence[T],
+    sequence: Sequence[T],
+    base: int = 1315423911,
+    mod: int = (1 << 61) - 1,
+) -> List[int]:
+    """Return start indices of exact matches of *pattern* using a rolling hash.
+
+    Each window of `sequence` is reduced to a polynomial hash of its item
+    hashes, updated in O(1) per position; windows are compared item by
+    item only when their hash equals the pattern's. Raises TypeError if an
+    item is not hashable.
+    """
+    L = len(pattern)
+    N = len(sequence)
+    if L == 0 or N < L:
+        return []
+
+    pat = tuple(pattern)
+    hashes = list(map(hash, sequence))
+    top = pow(base, L - 1, mod)
+
+    pat_hash = 0
+    h = 0
+    for k in range(L):
+        pat_hash = (pat_hash * base + hash(pat[k])) % mod
+        h = (h * base + hashes[k]) % mod
+
+    starts: List[int] = []
+    for i in range(N - L + 1):
+        if i:
+            h = ((h - hashes[i - 1] * top) * base + hashes[i + L - 1]) % mod
+        if h == pat_hash and tuple(sequence[i : i + L]) == pat:
+            starts.append(i)
+
+    return starts
+
+
+def _int_search(
+    needle: Sequence[Any],
+    haystack: Sequence[Any],
+) -> Optional[List[int]]:
+    """Find exact occurrences of a run of integers with a byte-level search.
+
+    Both sides are packed into signed 64-bit `array` buffers and searched
+    with `bytes.find`, keeping only hits aligned to an item boundary. This
+    avoids comparing boxed Python ints one by one.
+
+    Returns None if either side holds anything other than integers that
+    fit in 64 bits, so callers can fall back to a generic scan.
+    """
+    try:
+        # go through a list so bytes-like inputs are not read as raw buffers
+        pat = array("q", list(needle))
+        seq = array("q", list(haystack))
+    except (TypeError, OverflowError):
+        return None
+
+    size = seq.itemsize
+    sub_bytes = pat.tobytes()
+    hay = seq.tobytes()
+
+    starts: List[int] = []
+    k = hay.find(sub_bytes)
+    while k != -1:
+        if k % size == 0:
+            starts.append(k // size)
+        k = hay.find(sub_bytes, (k // size + 1) * size)
+
+    return starts
+
+
+def _kmp_fail(pattern: Sequence[T]) -> List[int]:
+    """Build the Knuth–Morris–Pratt failure table for *pattern*.
+
+    `fail[k]` is the length of the longest proper prefix of
+    `pattern[:k+1]` that is also a suffix of it.
+    """
+    L = len(pattern)
+    fail = [0] * L
+    k = 0
+    for q in range(1, L):
+        x = pattern[q]
+        while k and x is not pattern[k] and not x == pattern[k]:
+            k = fail[k - 1]
+        if x is pattern[k] or x == pattern[k]:
+            k += 1
+        fail[q] = k
+    return fail
+
+
+def _kmp_search(pattern: Sequence[T], sequence: Sequence[T]) -> List[int]:
+    """Return start indices of exact matches of *pattern* using KMP.
+
+    Scans `sequence` once, never re-reading an item, and only needs
+    equality tests (with the identity shortcut of list equality), so it
+    works for unhashable items as well.
+    """
+    L = len(pattern)
+    if L == 0:
+        return []
+
+    fail = _kmp_fail(pattern)
+    starts: List[int] = []
+    k = 0
+    for q, x in enumerate(sequence):
+        while True:
+            if x is pattern[k] or x == pattern[k]:
+                k += 1
+                break
+            if k == 0:
+                break
+            k = fail[k - 1]
+        if k == L:
+            starts.append(q - L + 1)
+            k = fail[k - 1]
+    return starts
+
+
+def _exact_starts(
+    pattern: Sequence[T],
+    sequence: Sequence[T],
+) -> List[int]:
+    """Return the sorted start indices of exact matches of *pattern*.
+
+    Picks the search strategy from the pattern: Boyer–Moore–Horspool by
+    default, a packed-integer or rolling-hash search for repetitive
+    patterns, and Knuth–Morris–Pratt for unhashable items.
+    """
+    matches: List[int] = []
+    L = len(pattern)
+    N = len(sequence)
+    if L == 0:
+        return matches
+
+    pat = tuple(pattern)
+
+    try:
+        table = _horspool_table(pat)
+    except TypeError:
+        table = None
+
+    if table is None:
+        # unhashable items: equality-only Knuth–Morris–Pratt
+        return _kmp_search(pat, sequence)
+
+    if L == 1:
+        p = pat[0]
+        for i in range(N):
+            x = sequence[i]
+            if x is p or x == p:
+                matches.append(i)
+        return matches
+
+    if 2 * len(table) < L - 1:
+        # few distinct items keep Horspool shifts short: search integer
+        # buffers directly, or use a rolling hash for other items
+        starts = _int_search(pat, sequence)
+        if starts is not None:
+            return starts
+        try:
+            return _rabin_karp(pat, sequence)
+        except TypeError:
+            pass
+
+    # Boyer–Moore–Horspool: compare right-to-left, shift on the last item
+    last = pat[L - 1]
+    shift = table.get
+    end = N - L
+    i = 0
+    while i <= end:
+        s = sequence[i + L - 1]
+        # `x is p or x == p`, like list equality, so identical items such
+        # as a shared NaN still match
+        if s is last or s == last:
+            for j in range(L - 2, -1, -1):
+                x = sequence[i + j]
+                p = pat[j]
+                if x is not p and not x == p:
+                    break
+            else:
+                matches.append(i)
+        try:
+            i += shift(s, L)
+        except TypeError:
+            # unhashable item in the sequence: fall back to a single step
+            i += 1
+
+    return matches
+
+
 # ----------------------------
 # Core variation detectors
 # ----------------------------
@@ -56,17 +333,7 @@ def repetition(
     list of int
         Starting indices where `sequence[i:i+len(pattern)] == pattern`.
     """
-    matches: List[int] = []
-    L = len(pattern)
-    N = len(sequence)
-    if L == 0:
-        return matches
-
-    for i in range(N - L + 1):
-        if list(sequence[i : i + L]) == list(pattern):
-            matches.append(i)
-
-    return matches
+    return _exact_starts(pattern, sequence)
 
 
 def transposition(
@@ -98,33 +365,58 @@ def transposition(
     results: List[Dict[str, Any]] = []
     L = len(pattern)
     N = len(sequence)
-    if L == 0:
+    if L == 0 or N < L:
         return results
 
-    for i in range(N - L + 1):
-        segment = sequence[i : i + L]
-
+    if not require_same_aux:
+        aux_fn = None
+    pat_vals, pat_aux = _components(pattern, value_fn, aux_fn)
+    seq_vals, seq_aux = _components(sequence, value_fn, aux_fn)
+    if require_same_aux and _all_aux_none(pat_aux, seq_aux):
+        require_same_aux = False
+    if require_same_aux:
+        pat_aux = _no_identity_match(pat_aux)
+    first = pat_vals[0]
+
+    # For integers, a constant offset is the same as equal successive
+    # steps, so candidate windows can be found with an exact search.
+    try:
+        candidates = _int_search(
+            list(map(sub, pat_vals[1:], pat_vals)),
+            list(map(sub, seq_vals[1:], seq_vals)),
+        )
+    except TypeError:
+        # non-numeric values; only windows that are reached must subtract
+        candidates = None
+    exact = candidates is not None
+    if candidates is None:
+        candidates = range(N - L + 1)
+    second = pat_vals[1] if L > 1 else None
+
+    for i in candidates:
         # 1) Optional aux equality check
-        if require_same_aux:
-            if not all(aux_fn(segment[j]) == aux_fn(pattern[j]) for j in range(L)):
-                continue
+        if require_same_aux and seq_aux[i : i + L] != pat_aux:
+            continue
 
         # 2) Compute candidate offset from first element
-        base_offset = value_fn(segment[0]) - value_fn(pattern[0])
+        base_offset = seq_vals[i] - first
 
-        # skip trivial exact repetition (offset == 0)
-        if base_offset == 0:
+        # skip trivial exact repetition (offset == 0), and offsets that are
+        # not equal to themselves (NaN), which no element can match
+        if base_offset == 0 or base_offset != base_offset:
             continue
 
-        # 3) Check consistent offset for all elements
-        ok = True
-        for j in range(L):
-            if value_fn(segment[j]) - value_fn(pattern[j]) != base_offset:
-                ok = False
-                break
+        # 3) Check consistent offset for all elements, stopping at the
+        #    first mismatch (most windows are rejected on the second one)
+        if not exact and L > 1 and (
+            seq_vals[i + 1] - second != base_offset
+            or any(
+                seq_vals[i + j] - pat_vals[j] != base_offset for j in range(2, L)
+            )
+        ):
+            continue
 
-        if ok:
-            results.append({"position": i, "offset": base_offset})
+        results.append({"position": i, "offset": base_offset})
 
     return results
 
@@ -152,20 +444,30 @@ def retrograde(
     if L == 0:
         return matches
 
-    for i in range(N - L + 1):
-        segment = sequence[i : i + L]
-        ok = True
-        for j in range(L):
-            p = pattern[L - 1 - j]
-            s = segment[j]
-            if primary_fn(s) != primary_fn(p):
-                ok = False
-                break
-            if require_same_aux and aux_fn(s) != aux_fn(p):
-                ok = False
-                break
-        if ok:
-            matches.append(i)
+    if not require_same_aux:
+        aux_fn = None
+    pat_prim, pat_aux = _components(pattern, primary_fn, aux_fn)
+    seq_prim, seq_aux = _components(sequence, primary_fn, aux_fn)
+    if require_same_aux and _all_aux_none(pat_aux, seq_aux):
+        require_same_aux = False
+
+    # compare windows against the reversed pattern
+    rev_prim = _no_identity_match(pat_prim[::-1])
+    rev_aux = _no_identity_match(pat_aux[::-1]) if require_same_aux else None
+    first = rev_prim[0]
+
+    candidates = _int_search(rev_prim, seq_prim)
+    if candidates is None:
+        candidates = [
+            i
+            for i in range(N - L + 1)
+            if seq_prim[i] == first and seq_prim[i : i + L] == rev_prim
+        ]
+
+    for i in candidates:
+        if require_same_aux and seq_aux[i : i + L] != rev_aux:
+            continue
+        matches.append(i)
 
     return matches
 
@@ -200,31 +502,42 @@ def inversion(
     if L == 0:
         return matches
 
-    axis = value_fn(pattern[0])
-
-    for i in range(N - L + 1):
-        segment = sequence[i : i + L]
-
-        # 1) First element must lie on the same axis
-        if value_fn(segment[0]) != axis:
-            continue
+    if not require_same_aux:
+        aux_fn = None
+    pat_vals, pat_aux = _components(pattern, value_fn, aux_fn)
+    seq_vals, seq_aux = _components(sequence, value_fn, aux_fn)
+    if require_same_aux and _all_aux_none(pat_aux, seq_aux):
+        require_same_aux = False
+    if require_same_aux:
+        pat_aux = _no_identity_match(pat_aux)
+
+    axis = pat_vals[0]
+    try:
+        expected = _no_identity_match([axis - (v - axis) for v in pat_vals])
+    except TypeError:
+        # some pattern values cannot be mirrored; windows that are rejected
+        # before reaching them must not fail, so mirror lazily per window
+        expected = None
+
+    # 1) + 3) Windows starting on the axis with all values mirrored
+    candidates = _int_search(expected, seq_vals) if expected is not None else None
+    if candidates is None:
+        candidates = [
+            i
+            for i in range(N - L + 1)
+            if seq_vals[i] == axis
+            and (expected is None or seq_vals[i : i + L] == expected)
+        ]
 
+    for i in candidates:
         # 2) Optional aux equality
-        if require_same_aux:
-            if not all(aux_fn(segment[j]) == aux_fn(pattern[j]) for j in range(L)):
-                continue
-
-        # 3) Check mirrored values
-        ok = True
-        for j in range(L):
-            v = value_fn(pattern[j])
-            expected = axis - (v - axis)
-            if value_fn(segment[j]) != expected:
-                ok = False
-                break
-
-        if ok:
-            matches.append(i)
+        if require_same_aux and seq_aux[i : i + L] != pat_aux:
+            continue
+        if expected is None and any(
+            seq_vals[i + j] != axis - (pat_vals[j] - axis) for j in range(L)
+        ):
+            continue
+        matches.append(i)
 
     return matches
 
@@ -266,22 +579,21 @@ def local_aux_changes(
     if max_changes is None:
         max_changes = max(1, L // 4)
 
-    for i in range(N - L + 1):
-        segment = sequence[i : i + L]
+    pat_prim, pat_aux = _components(pattern, primary_fn, aux_fn)
+    seq_prim, seq_aux = _components(sequence, primary_fn, aux_fn)
+    match_prim = _no_identity_match(pat_prim)
 
+    for i in range(N - L + 1):
         # 1) primary pattern must match exactly
-        if not all(primary_fn(segment[j]) == primary_fn(pattern[j]) for j in range(L)):
+        if seq_prim[i : i + L] != match_prim:
             continue
 
-        # 2) record aux changes
-        changed = [
-            {"index": j, "new_aux": aux_fn(segment[j])}
-            for j in range(L)
-            if aux_fn(segment[j]) != aux_fn(pattern[j])
-        ]
+        # 2) record aux changes (as indices; dicts only for kept windows)
+        changed = [j for j in range(L) if seq_aux[i + j] != pat_aux[j]]
 
         if 0 < len(changed) <= max_changes:
-            results.append({"position": i, "changed": changed})
+            changes = [{"index": j, "new_aux": seq_aux[i + j]} for j in changed]
+            results.append({"position": i, "changed": changes})
 
     return results
 
@@ -321,21 +633,24 @@ def local_value_changes(
     if max_changes is None:
         max_changes = max(1, L // 4)
 
-    for i in range(N - L + 1):
-        segment = sequence[i : i + L]
+    if not require_same_aux:
+        aux_fn = None
+    pat_prim, pat_aux = _components(pattern, primary_fn, aux_fn)
+    seq_prim, seq_aux = _components(sequence, primary_fn, aux_fn)
+    if require_same_aux and _all_aux_none(pat_aux, seq_aux):
+        require_same_aux = False
+    if require_same_aux:
+        pat_aux = _no_identity_match(pat_aux)
 
-        if require_same_aux:
-            if not all(aux_fn(segment[j]) == aux_fn(pattern[j]) for j in range(L)):
-                continue
+    for i in range(N - L + 1):
+        if require_same_aux and seq_aux[i : i + L] != pat_aux:
+            continue
 
-        changed = [
-            {"index": j, "new_value": primary_fn(segment[j])}
-            for j in range(L)
-            if primary_fn(segment[j]) != primary_fn(pattern[j])
-        ]
+        changed = [j for j in range(L) if seq_prim[i + j] != pat_prim[j]]
 
         if 0 < len(changed) <= max_changes:
-            results.append({"position": i, "changed": changed})
+            changes = [{"index": j, "new_value": seq_prim[i + j]} for j in changed]
+            results.append({"position": i, "changed": changes})
 
     return results
 
@@ -344,35 +659,64 @@ def local_value_changes(
 # Fragmentation & extension
 # ----------------------------
 
-def _removed_positions_for_fragment(
+def _encode(
     pattern: Sequence[T],
-    fragment: Sequence[T],
-) -> Optional[List[int]]:
-    """Return indices removed from pattern to obtain fragment as a subsequence.
+    sequence: Sequence[T],
+) -> Tuple[List[Any], List[Any]]:
+    """Replace items by integer codes shared between pattern and sequence.
+
+    Equal items get equal codes and sequence items that do not occur in
+    the pattern get -1, so item equality reduces to int equality. If an
+    item is not hashable, or a pattern item is not equal to itself (dict
+    lookups would still match it by identity), both inputs are returned
+    unchanged as lists.
+    """
+    if any(x != x for x in pattern):
+        return list(pattern), list(sequence)
+
+    codes: Dict[Any, int] = {}
+    try:
+        pat_codes = [codes.setdefault(x, len(codes)) for x in pattern]
+        seq_codes = list(map(codes.get, sequence, repeat(-1)))
+    except TypeError:
+        return list(pattern), list(sequence)
+    return pat_codes, seq_codes
 
-    If `fragment` is not a subsequence of `pattern` in order, returns None.
-    Otherwise returns a list of indices in `pattern` that were skipped.
+
+def _longest_fragment(
+    pattern: Sequence[T],
+    sequence: Sequence[T],
+    start: int,
+    max_len: int,
+) -> Tuple[int, List[int]]:
+    """Match the longest fragment of *pattern* starting at `sequence[start]`.
+
+    Walks `pattern` and `sequence[start:]` with two pointers, greedily
+    matching items in order, and stops once `max_len` sequence items are
+    matched or either side is exhausted. Every prefix of a subsequence is
+    itself a subsequence, so the returned length is the longest valid
+    fragment at `start`.
+
+    Returns a pair `(length, removed)` where `removed` lists the indices in
+    `pattern` that are skipped to obtain that fragment.
     """
     i = 0
-    j = 0
+    j = start
     removed: List[int] = []
     Lp = len(pattern)
-    Lf = len(fragment)
+    stop = min(len(sequence), start + max_len)
 
-    while i < Lp and j < Lf:
-        if pattern[i] == fragment[j]:
-            i += 1
+    while i < Lp and j < stop:
+        if pattern[i] == sequence[j]:
             j += 1
         else:
             removed.append(i)
-            i += 1
+        i += 1
 
     # anything left in pattern after fragment is matched is also removed
-    while i < Lp:
-        removed.append(i)
-        i += 1
+    removed.extend(range(i, Lp))
 
-    return removed if j == Lf else None
+    return j - start, removed
 
 
 def fragmentation(
@@ -417,38 +761,28 @@ def fragmentation(
     if min_len is None:
         min_len = L - (L // 4)
 
-    # Pre-compute spans of exact full-pattern matches to exclude them
-    exact_spans = [
-        (s, s + L - 1)
-        for s in range(N - L + 1)
-        if list(sequence[s : s + L]) == list(pattern)
-    ]
+    # Pre-compute (sorted) starts of exact full-pattern matches to exclude them
+    exact_starts = _exact_starts(pattern, sequence)
 
     def inside_exact_span(start: int, end: int) -> bool:
-        return any(a <= start and end <= b for a, b in exact_spans)
-
-    best_by_pos: Dict[int, List[int]] = {}
+        # all spans have length L, so only the last one starting at or
+        # before `start` can cover [start, end]
+        idx = bisect_right(exact_starts, start) - 1
+        return idx >= 0 and end <= exact_starts[idx] + L - 1
 
-    for frag_len in range(min_len, L):
-        for start in range(N - frag_len + 1):
-            end = start + frag_len - 1
-            if inside_exact_span(start, end):
-                continue
+    # compare small integer codes instead of (possibly nested) items
+    pat_codes, seq_codes = _encode(pattern, sequence)
 
-            fragment = sequence[start : start + frag_len]
-            removed = _removed_positions_for_fragment(pattern, fragment)
-            if removed is None:
-                continue
-
-            existing = best_by_pos.get(start)
-            if existing is None or len(removed) < len(existing):
-                best_by_pos[start] = removed
+    results: List[Dict[str, Any]] = []
 
-    # Convert to sorted list
-    results = [
-        {"position": pos, "removed_indices": removed}
-        for pos, removed in sorted(best_by_pos.items())
-    ]
+    # For each start only the longest fragment (fewest removals) is kept.
+    # Shorter fragments at the same start lie inside any exact span that
+    # covers the longest one, so checking that one alone is enough.
+    for start in range(N - min_len + 1):
+        frag_len, removed = _longest_fragment(pat_codes, seq_codes, start, L - 1)
+        if frag_len < min_len or inside_exact_span(start, start + frag_len - 1):
+            continue
+        results.append({"position": start, "removed_indices": removed})
 
     # Remove overlaps: keep earliest non-overlapping matches
     filtered: List[Dict[str, Any]] = []
@@ -466,46 +800,47 @@ def fragmentation(
 
 def _added_positions_for_fragment(
     pattern: Sequence[T],
-    fragment: Sequence[T],
+    sequence: Sequence[T],
+    start: int,
+    max_len: int,
 ) -> Optional[List[Dict[str, Any]]]:
-    """Return description of items added to a fragment that contains pattern.
+    """Return description of items added to *pattern* in a fragment at `start`.
+
+    Walks `sequence[start:]` greedily matching pattern items in order and
+    stops as soon as the pattern is fully matched, so the fragment always
+    ends on its last pattern item. At most `max_len` items are consumed.
 
-    If `pattern` is not a subsequence of `fragment` in order, returns None.
+    If the fragment does not start on the first pattern item, the pattern
+    is not matched within that span, or nothing was added, returns None.
     Otherwise returns a list of dicts, each of the form::
 
-        { "index": j, "value": fragment[j] }
+        { "index": j, "value": sequence[start + j] }
 
     describing items in the fragment that do not belong to the pattern.
     """
-    i = 0
-    j = 0
+    # reject up front if the additions would start at the very beginning
+    # (they can never reach the very end, since the walk stops on the last
+    # pattern item)
+    if sequence[start] != pattern[0]:
+        return None
+
+    i = 1
+    j = start + 1
     Lp = len(pattern)
-    Lf = len(fragment)
-    added: List[Dict[str, Any]] = []
+    stop = min(len(sequence), start + max_len)
+    added: List[int] = []
 
-    while j < Lf and i < Lp:
-        if fragment[j] == pattern[i]:
+    while i < Lp and j < stop:
+        if sequence[j] == pattern[i]:
             i += 1
-            j += 1
         else:
-            added.append({"index": j, "value": fragment[j]})
-            j += 1
-
-    # remaining fragment elements after pattern is fully matched
-    while j < Lf:
-        added.append({"index": j, "value": fragment[j]})
+            added.append(j)
         j += 1
 
     if i != Lp or not added:
         return None
 
-    # reject if all additions are at very start or very end
-    first = added[0]["index"]
-    last = added[-1]["index"]
-    if first == 0 or last == Lf - 1:
-        return None
-
-    return added
+    return [{"index": k - start, "value": sequence[k]} for k in added]
 
 
 def extension(
@@ -554,22 +889,13 @@ def extension(
 
     results: List[Dict[str, Any]] = []
 
+    # Any longer fragment would end on an added item, so the single
+    # fragment ending on the last pattern item is the only candidate.
     for start in range(N - L + 1):
-        best: Optional[Dict[str, Any]] = None
-
-        for frag_len in range(L + 1, L + max_extra + 1):
-            end = start + frag_len
-            if end > N:
-                break
-            fragment = sequence[start:end]
-            added = _added_positions_for_fragment(pattern, fragment)
-            if not added:
-                continue
-
-            # keep only the longest valid fragment for this start
-            best = {"position": start, "added": added}
-
-        if best is not None:
-            results.append(best)
+        added = _added_positions_for_fragment(
+            pattern, sequence, start, L + max_extra
+        )
+        if added is not None:
+            results.append({"position": start, "added": added})
 
     return results
@@ -17,6 +17,51 @@ def test_repetition_basic():
     assert repetition(pattern, seq) == [1, 3]
 
 
+def test_repetition_overlapping_and_unhashable():
+    assert repetition([1, 1], [1, 1, 1, 0, 1, 1]) == [0, 1, 4]
+    pattern = [[1], [2]]
+    seq = [[0], [1], [2], [1], [2]]
+    assert repetition(pattern, seq) == [1, 3]
+    # repeated prefix, so a mismatch must not skip past a match
+    pattern = [[1], [1], [2]]
+    seq = [[1], [1], [1], [2], [1], [1], [2]]
+    assert repetition(pattern, seq) == [1, 4]
+
+
+def test_repetition_identical_items_match():
+    # like list equality, the same object matches itself even if x != x
+    x = float("nan")
+    assert repetition([x, 1.0], [x, 1.0]) == [0]
+    assert repetition([2.0, x, 1.0], [0.0, 2.0, x, 1.0]) == [1]
+    assert repetition([x], [1.0, x]) == [1]
+
+
+
+def test_repetition_identical_unhashable_items_match():
+    class Opaque:
+        __hash__ = None  # type: ignore[assignment]
+
+        def __eq__(self, other):
+            return False
+
+    a, b = Opaque(), Opaque()
+    assert repetition([a, b, a], [b, a, b, a, a]) == [1]
+
+
+def test_repetition_repetitive_pattern():
+    pattern = [0, 0, 0, 0, 1]
+    seq = [0] * 6 + [1, 0, 0, 0, 0, 1]
+    assert repetition(pattern, seq) == [2, 7]
+
+
+def test_repetition_repetitive_pattern_non_integer_items():
+    # hashable but not packable as integers: the rolling-hash search
+    assert repetition("aaaab", "aaaaaabaaaabaaab") == [2, 7]
+    pattern = [(0, "q")] * 4 + [(1, "q")]
+    seq = [(0, "q")] * 5 + [(1, "q"), (0, "h")] + pattern
+    assert repetition(pattern, seq) == [1, 7]
+
+
 def test_transposition_integers():
     pattern = [1, 2, 3]
     seq = [1, 2, 3, 2, 3, 4]
@@ -25,6 +70,31 @@ def test_transposition_integers():
     assert res == [{"position": 3, "offset": 1}]
 
 
+def test_transposition_pairs_aux():
+    pattern = [(60, 1.0), (62, 0.5)]
+    seq = [(62, 1.0), (64, 0.5), (65, 0.5), (67, 0.5)]
+    assert transposition(pattern, seq) == [{"position": 0, "offset": 2}]
+    res = transposition(pattern, seq, require_same_aux=False)
+    assert res == [
+        {"position": 0, "offset": 2},
+        {"position": 2, "offset": 5},
+    ]
+
+
+def test_transposition_skips_non_numeric_items_with_other_aux():
+    # e.g. a rest encoded with a None value; its aux never matches
+    pattern = [(60, 1.0), (62, 1.0)]
+    seq = [(None, 0.5), (62, 1.0), (64, 1.0)]
+    assert transposition(pattern, seq) == [{"position": 1, "offset": 2}]
+
+
+def test_transposition_stops_at_first_offset_mismatch():
+    # the second item keeps the offset, the third breaks it before the rest
+    pattern = [(60, 1), (62, 1), (64, 1), (None, 1)]
+    seq = [(61, 1), (63, 1), (66, 1), (None, 1)]
+    assert transposition(pattern, seq) == []
+
+
 def test_retrograde_pairs():
     pattern = [(1, "a"), (2, "b"), (3, "c")]
     # reversed both value and aux
@@ -32,6 +102,12 @@ def test_retrograde_pairs():
     assert retrograde(pattern, seq) == [0]
 
 
+def test_retrograde_never_matches_nan():
+    x = float("nan")
+    assert retrograde([x, 2.0], [2.0, x]) == []
+    assert retrograde([(1, x), (2, "b")], [(2, "b"), (1, x)]) == []
+
+
 def test_inversion_simple():
     # axis = 0
     pattern = [0, 1, -1]
@@ -39,6 +115,23 @@ def test_inversion_simple():
     assert inversion(pattern, seq) == [0]
 
 
+def test_transposition_and_inversion_never_match_nan():
+    # values and aux are compared with ==, so even a shared NaN never matches
+    x = float("nan")
+    assert transposition([1.0], [x, 2.0]) == [{"position": 1, "offset": 1.0}]
+    assert transposition([(1, x)], [(2, x)]) == []
+    assert inversion([(0, x), (1, x)], [(0, x), (-1, x)]) == []
+
+
+def test_inversion_with_unmirrorable_pattern_values():
+    # windows are rejected before reaching the None (rest) or str values
+    pattern = [(60, 1), (62, 1), (None, 1)]
+    seq = [(70, 1), (72, 1), (74, 1)]
+    assert inversion(pattern, seq) == []
+    assert inversion(["a", "b"], ["c", "d"]) == []
+    assert inversion([0, 2, None], [1, 0, -1, 5]) == []
+
+
 def test_local_aux_changes():
     pattern = [(1, 1.0), (2, 1.0), (3, 1.0)]
     seq = [
@@ -67,6 +160,16 @@ def test_local_value_changes():
     assert res[0]["changed"][0]["index"] == 2
 
 
+def test_local_changes_never_match_nan():
+    x = float("nan")
+    pattern = [(x, 1.0), (2, 1.0)]
+    seq = [(x, 1.0), (2, 0.5)]
+    assert local_aux_changes(pattern, seq, max_changes=1) == []
+    pattern = [(1, x), (2, 1.0)]
+    seq = [(1, x), (3, 1.0)]
+    assert local_value_changes(pattern, seq, max_changes=1) == []
+
+
 def test_fragmentation_basic():
     pattern = [1, 2, 3, 4]
     seq = [1, 2, 4, 5]
@@ -77,6 +180,13 @@ def test_fragmentation_basic():
     assert res[0]["removed_indices"] == [2]
 
 
+def test_fragmentation_skips_exact_matches():
+    pattern = [1, 2, 3, 4]
+    seq = [1, 2, 3, 4, 9, 1, 2, 4, 7]
+    res = fragmentation(pattern, seq)
+    assert res == [{"position": 5, "removed_indices": [2]}]
+
+
 def test_extension_basic():
     pattern = [1, 2, 3]
     # insert 9 in the middle
@@ -88,3 +198,52 @@ def test_extension_basic():
     assert len(added) == 1
     assert added[0]["index"] == 1
     assert added[0]["value"] == 9
+
+
+def test_extension_respects_max_extra():
+    pattern = [1, 2, 3]
+    seq = [1, 9, 9, 2, 3, 1, 2, 8, 3, 3]
+    res = extension(pattern, seq, max_extra=1)
+    assert res == [{"position": 5, "added": [{"index": 2, "value": 8}]}]
+    res = extension(pattern, seq, max_extra=2)
+    assert [r["position"] for r in res] == [0, 5]
+    assert res[0]["added"] == [
+        {"index": 1, "value": 9},
+        {"index": 2, "value": 9},
+    ]
+
+
+def test_integer_fast_path_matches_generic_path():
+    # the same data as ints (searched as 64-bit buffers) and as floats
+    pattern = [0, 2, 1]
+    seq = [5, 0, 2, 1, 3, 5, 4, 0, -2, -1, 1, 2, 0]
+    as_float = [float(x) for x in seq]
+    pat_float = [float(x) for x in pattern]
+    assert retrograde(pattern, seq) == retrograde(pat_float, as_float) == [10]
+    assert inversion(pattern, seq) == inversion(pat_float, as_float) == [7]
+    assert transposition(pattern, seq) == [
+        {"position": 4, "offset": 3},
+    ]
+    assert transposition(pat_float, as_float) == [
+        {"position": 4, "offset": 3.0},
+    ]
+
+
+def test_fragmentation_compares_whole_items():
+    pattern = [(1, "a"), (2, "b"), (3, "c"), (4, "d")]
+    seq = [(1, "a"), (2, "b"), (4, "d"), (9, "z")]
+    res = fragmentation(pattern, seq)
+    assert res == [{"position": 0, "removed_indices": [2]}]
+    # same primaries, different aux on the last item: no longer a fragment
+    seq[2] = (4, "x")
+    assert fragmentation(pattern, seq) == []
+    # items are matched with ==, so even the same NaN object never matches
+    x = float("nan")
+    assert fragmentation([1.0, x, 2.0, 3.0], [1.0, x, 3.0, 9.0]) == []
+
+
+def test_aux_check_with_aux_only_in_sequence():
+    pattern = [1, 2]
+    seq = [(2, "a"), (1, "b"), 2, 1]
+    assert retrograde(pattern, seq) == [2]
+    assert retrograde(pattern, seq, require_same_aux=False) == [0, 2]